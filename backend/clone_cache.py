@@ -0,0 +1,124 @@
+
+import os
+import time
+import fcntl
+import hashlib
+import pathlib
+import tempfile
+import shutil
+import logging
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+# Persistent clone cache, one bare repository per repo URL
+CLONE_CACHE = pathlib.Path(os.environ.get('GITTIME_CACHE', '/var/tmp/gittime'))
+
+class CloneCache:
+    """Bare clones on disk shared by all workers, with per-repository locks and LRU eviction"""
+    
+    MAX_CACHED_REPOS = 50  # Clones kept, least recently used evicted first
+    CLONE_MAX_AGE_SECONDS = 7 * 24 * 3600  # Clones unused for longer are evicted
+    LOCK_POLL_SECONDS = 0.2  # Retry interval while another process holds a repository lock
+    
+    def __init__(self, root: pathlib.Path = CLONE_CACHE, stale_temp_seconds: float = 240):
+        self.root = root
+        # Temp clones and .trash dirs older than this were abandoned by a crash
+        self.stale_temp_seconds = stale_temp_seconds
+        # In-process lock per repository, dropped once no analysis holds it
+        self._repo_locks = weakref.WeakValueDictionary()
+    
+    @asynccontextmanager
+    async def lock(self, repo_url: str) -> AsyncIterator[pathlib.Path]:
+        """Hold the in-process and cross-process locks on a repository's clone, yielding its path"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        repo_key = hashlib.sha256(repo_url.encode()).hexdigest()
+        
+        # Analyses in this process queue on an asyncio lock, so only other
+        # workers are polled for the flock
+        repo_lock = self._repo_locks.get(repo_key)
+        if repo_lock is None:
+            repo_lock = self._repo_locks[repo_key] = asyncio.Lock()
+        
+        async with repo_lock:
+            lock_path = self.root / f"{repo_key}.lock"
+            while True:
+                lock_file = open(lock_path, 'a')
+                try:
+                    # Non-blocking, so a wait never ties up an executor thread
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    # The sweep unlinks lock files of evicted repositories; a
+                    # lock on an unlinked file excludes no one, so take it again
+                    if os.fstat(lock_file.fileno()).st_ino == os.stat(lock_path).st_ino:
+                        break
+                except (BlockingIOError, FileNotFoundError):
+                    pass
+                except BaseException:
+                    lock_file.close()
+                    raise
+                lock_file.close()
+                await asyncio.sleep(self.LOCK_POLL_SECONDS)
+            
+            # Closing the lock file releases the flock
+            with lock_file:
+                yield self.root / repo_key
+    
+    def temp_dir(self) -> str:
+        """Create a scratch directory inside the cache, so it can be renamed into place"""
+        return tempfile.mkdtemp(dir=self.root)
+    
+    def discard(self, path) -> None:
+        """Move a directory aside and delete it in a background thread"""
+        try:
+            # Renaming is O(1), so the path is free again before the slow delete
+            trash_dir = tempfile.mkdtemp(dir=self.root, suffix='.trash')
+            os.rename(path, os.path.join(trash_dir, 'repo'))
+        except OSError:
+            trash_dir = path
+        
+        asyncio.get_running_loop().run_in_executor(None, shutil.rmtree, trash_dir, True)
+    
+    def sweep(self) -> None:
+        """Evict stale clones beyond the cache limits and remove leftovers of interrupted runs"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        repos = []
+        
+        for entry in os.scandir(self.root):
+            try:
+                age = now - entry.stat(follow_symlinks=False).st_mtime
+            except FileNotFoundError:
+                continue
+            
+            if entry.name.startswith('tmp'):
+                # mkdtemp clones and .trash dirs
+                if age > self.stale_temp_seconds:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            elif entry.name.endswith('.lock'):
+                # Lock files of URLs that never cloned successfully
+                if not os.path.exists(entry.path[:-len('.lock')]):
+                    self._evict(entry.name[:-len('.lock')])
+            elif entry.is_dir(follow_symlinks=False):
+                repos.append((age, entry.name))
+        
+        # Most recently used first
+        repos.sort()
+        for index, (age, repo_key) in enumerate(repos):
+            if index >= self.MAX_CACHED_REPOS or age > self.CLONE_MAX_AGE_SECONDS:
+                self._evict(repo_key)
+    
+    def _evict(self, repo_key: str) -> None:
+        """Delete a cached clone and its lock file unless an analysis is using it"""
+        lock_path = self.root / f"{repo_key}.lock"
+        with open(lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # In use; a later sweep will retry
+            
+            shutil.rmtree(self.root / repo_key, ignore_errors=True)
+            lock_path.unlink(missing_ok=True)
+        logger.info(f"Evicted cached clone {repo_key}")
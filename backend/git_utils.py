@@ -1,16 +1,59 @@
 
 import os
-import tempfile
-import shutil
+import re
+import sys
+import signal
+import heapq
+import functools
+import pathlib
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from collections import OrderedDict, defaultdict
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import List, Dict, Any, Tuple, AsyncIterator
 import asyncio
-import subprocess
-from git import Repo
+
+from clone_cache import CloneCache
 
 logger = logging.getLogger(__name__)
 
+# Never let git block on a credential prompt (e.g. private or mistyped URLs)
+GIT_ENV = {**os.environ, 'GIT_TERMINAL_PROMPT': '0', 'GIT_ASKPASS': 'true'}
+
+@dataclass(slots=True, frozen=True)
+class CommitRecord:
+    """A commit as parsed from `git log --numstat`"""
+    hash: str
+    parents: Tuple[str, ...]
+    author: str
+    email: str
+    date: str
+    message: str
+    files_changed: Tuple[str, ...]
+    insertions: int
+    deletions: int
+
+@dataclass(slots=True)
+class _OwnerStats:
+    """Per-author accumulator for ownership data"""
+    commits: int = 0
+    lines_changed: int = 0
+    first_commit: str = '9999'  # Sorts after any ISO 8601 date
+    last_commit: str = ''
+
+@dataclass(slots=True)
+class _HotspotStats:
+    """Per-file accumulator for hotspot data"""
+    commits_touching: int = 0
+    lines_changed: int = 0
+
+@dataclass(slots=True)
+class _TrendStats:
+    """Per-month accumulator for complexity trend data"""
+    lines_added: int = 0
+    lines_deleted: int = 0
+    files_touched: int = 0
+
 class GitAnalyzer:
     """Handles git repository cloning and commit analysis"""
     
@@ -29,169 +72,389 @@ class GitAnalyzer:
     }
     
     # Performance constants
-    MAX_COMMITS = 100
+    MAX_COMMITS = 100  # Most recent commits scanned for topic matches
     MAX_DIFF_SIZE = 200
+    DIFF_READ_BYTES = 512  # Patch bytes read before git show is stopped
+    GIT_TIMEOUT_SECONDS = 120  # Clone/fetch limit so a stalled remote can't hang a request
+    MAX_GIT_ERROR_BYTES = 2048  # Tail of git's stderr kept for error messages
     DEFAULT_MONTHS_BACK = 30
     FALLBACK_MONTHS_BACK = 48
     MIN_COMMITS_THRESHOLD = 5
+    MAX_CONCURRENT_DIFFS = 8
+    MAX_RESULT_COMMITS = 20  # Most recent topic commits returned
+    MAX_MESSAGE_SCAN = 256  # Message head used for keyword matching
+    MAX_CACHED_DIFFS = 4096  # Diff excerpts kept across requests
+    
+    # `git log` record framing: each record starts with RS, header fields are
+    # separated by US and the (multi-line) message is terminated by NUL,
+    # followed by the commit's --numstat lines
+    LOG_FORMAT = '%x1e%H%x1f%P%x1f%an%x1f%ae%x1f%cI%x1f%B%x00'
+    NUMSTAT_RE = re.compile(r'^(\d+|-)\t(\d+|-)\t(.*)$')
+    
+    # Key terms marking significant commits; anchored at word start so
+    # 'Added' matches but 'paddle' does not
+    EVOLUTION_RE = re.compile(r'\b(?:add|implement|introduce|refactor|remove)', re.IGNORECASE)
+    
+    # Truncated diff excerpts keyed by (repo_dir, commit hash). A commit's
+    # patch never changes, so entries stay valid across fetches; shared by
+    # all analyzers and only touched from the event loop
+    _diff_cache: 'OrderedDict[Tuple[str, str], str]' = OrderedDict()
     
     def __init__(self):
-        self.temp_dir = None
-        self.repo = None
+        # Read-only after init, so one analyzer can serve concurrent requests.
+        # One compiled multi-keyword matcher per topic instead of per-keyword scans
+        self._topic_patterns = {
+            topic: self._compile_topic_patterns(tuple(keywords), tuple(self.TOPIC_PATHS.get(topic, [])))
+            for topic, keywords in self.TOPIC_KEYWORDS.items()
+        }
+        # A live clone is killed at the git timeout, so older temp dirs are abandoned
+        self.clone_cache = CloneCache(stale_temp_seconds=2 * self.GIT_TIMEOUT_SECONDS)
     
     async def analyze_repo(self, repo_url: str, topic: str) -> List[Dict[str, Any]]:
         """Clone repository and extract topic-related commits"""
-        try:
+        # Serialize concurrent analyses of the same repository
+        async with self.clone_cache.lock(repo_url) as cache_dir:
             # Clone repository
-            self.temp_dir = await self._clone_repo(repo_url)
-            self.repo = Repo(self.temp_dir)
-            
-            # Get all commits
-            commits = list(self.repo.iter_commits())
-            logger.info(f"Found {len(commits)} total commits")
-            
-            # Filter commits by topic
-            topic_commits = self._filter_commits_by_topic(commits, topic)
-            
-            # Convert to structured data
-            structured_commits = self._structure_commits(topic_commits)
+            repo_dir = await self._clone_repo(repo_url, cache_dir)
+            os.utime(repo_dir)  # Last use, for LRU eviction
             
-            return structured_commits[:20]  # Limit to 20 most recent
+            # Filter commits by topic while a single git process streams them
+            async with aclosing(self._iter_commits(repo_dir)) as commits:
+                topic_commits = await self._filter_commits_by_topic(commits, topic)
             
-        finally:
-            self._cleanup()
+            # Convert to structured data, reading diffs only for the commits returned
+            return await self._structure_commits(repo_dir, topic_commits)
     
-    async def _clone_repo(self, repo_url: str) -> str:
-        """Clone repository to temporary directory"""
-        temp_dir = tempfile.mkdtemp()
+    async def _clone_repo(self, repo_url: str, repo_dir: pathlib.Path) -> str:
+        """Clone repository into the clone cache, or fetch if already cached"""
+        if (repo_dir / 'HEAD').exists():
+            try:
+                await self._run_git(
+                    '-c', 'protocol.version=2', 'fetch', '--no-tags',
+                    '--depth', str(self.MAX_COMMITS), 'origin', 'HEAD',
+                    cwd=repo_dir
+                )
+                await self._run_git('update-ref', 'HEAD', 'FETCH_HEAD', cwd=repo_dir)
+                logger.info(f"Repository fetched into cached clone {repo_dir}")
+                return str(repo_dir)
+            except Exception as e:
+                logger.warning(f"Fetch into cached clone failed, re-cloning: {e}")
+                self.clone_cache.discard(repo_dir)
+        
+        # Clone next to the cache entry and move it into place once complete
+        temp_dir = self.clone_cache.temp_dir()
         
         try:
-            # Use subprocess for better control over cloning
-            cmd = ['git', 'clone', '--depth', '100', repo_url, temp_dir]
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            # Bare clone: only commit metadata and diffs are read, so skip the
+            # working tree checkout entirely; the default branch alone is needed
+            await self._run_git(
+                '-c', 'protocol.version=2', 'clone', '--bare', '--single-branch', '--no-tags',
+                '--depth', str(self.MAX_COMMITS), repo_url, temp_dir
             )
+            os.rename(temp_dir, repo_dir)
             
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                raise Exception(f"Git clone failed: {stderr.decode()}")
+            logger.info(f"Repository cloned to {repo_dir}")
             
-            logger.info(f"Repository cloned to {temp_dir}")
-            return temp_dir
+            # The cache grew, so evict old clones in the background
+            asyncio.get_running_loop().run_in_executor(None, self.clone_cache.sweep)
+            return str(repo_dir)
             
         except Exception as e:
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            self.clone_cache.discard(temp_dir)
             raise e
     
-    def _filter_commits_by_topic_optimized(self, commits, topic: str) -> List:
-        """Optimized filtering with early exit and path-based filtering"""
-        keywords = self.TOPIC_KEYWORDS.get(topic.lower(), [topic.lower()])
-        topic_paths = self.TOPIC_PATHS.get(topic.lower(), [topic.lower()])
-        filtered_commits = []
+    async def _run_git(self, *args: str, cwd=None) -> None:
+        """Run a git command with a hard timeout, keeping only the tail of stderr"""
+        process = await asyncio.create_subprocess_exec(
+            'git', *args,
+            cwd=cwd,
+            env=GIT_ENV,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True  # Own process group, so helpers can be killed too
+        )
+        command = next(arg for arg in args if arg[0] != '-' and '=' not in arg)
         
-        for commit in commits:
-            # Early exit if we have enough commits
-            if len(filtered_commits) >= self.MAX_COMMITS:
-                break
-                
-            # Check commit message first (fastest check)
-            message_match = any(keyword in commit.message.lower() for keyword in keywords)
-            
-            # Check changed files with path-based filtering
-            file_match = False
-            path_match = False
+        async def drain_stderr() -> bytes:
+            tail = b''
+            while chunk := await process.stderr.read(4096):
+                tail = (tail + chunk)[-self.MAX_GIT_ERROR_BYTES:]
+            await process.wait()
+            return tail
+        
+        try:
+            stderr = await asyncio.wait_for(drain_stderr(), timeout=self.GIT_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            # Kill the whole group: helpers such as git-remote-https inherit
+            # stderr and would otherwise keep the pipe (and the wait) open
             try:
-                files_changed = list(commit.stats.files.keys())
-                
-                # Limit file analysis to avoid performance hits
-                files_to_check = files_changed[:10]  # Check only first 10 files
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            raise Exception(f"Git {command} timed out after {self.GIT_TIMEOUT_SECONDS}s")
+        
+        if process.returncode != 0:
+            raise Exception(f"Git {command} failed: {stderr.decode('utf-8', 'replace')}")
+    
+    async def _iter_commits(self, repo_dir: str) -> AsyncIterator[CommitRecord]:
+        """Stream commit metadata and per-file stats from one `git log` process"""
+        cmd = [
+            'git', '-C', repo_dir, '-c', 'core.quotePath=false', 'log',
+            '-n', str(self.MAX_COMMITS),  # --depth bounds path length, not commit count
+            '--no-renames', '--numstat', '--diff-merges=first-parent',
+            f'--format={self.LOG_FORMAT}'
+        ]
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=1024 * 1024  # Long message lines must not overrun the reader
+        )
+        
+        # Commits at the shallow-clone boundary look like root commits, so git
+        # diffs them against the empty tree and reports every file in the repo
+        shallow = self._read_shallow(repo_dir)
+        
+        try:
+            header = []
+            fields = None  # Header of the record whose numstat lines are being read
+            files, insertions, deletions = [], 0, 0
+            
+            async for raw in process.stdout:
+                line = raw.decode('utf-8', 'replace')
                 
-                # Check for keyword matches in filenames
-                file_match = any(
-                    any(keyword in file_path.lower() for keyword in keywords)
-                    for file_path in files_to_check
-                )
+                if header:
+                    header.append(line)
+                elif line.startswith('\x1e'):
+                    if fields and fields[0] not in shallow:
+                        yield self._make_record(fields, files, insertions, deletions)
+                    fields = None
+                    header.append(line[1:])
+                elif fields:
+                    # Numstat line: "<insertions>\t<deletions>\t<path>" ("-" for binary)
+                    match = self.NUMSTAT_RE.match(line.rstrip('\n'))
+                    if match:
+                        added, deleted, path = match.groups()
+                        files.append(path)
+                        insertions += int(added) if added != '-' else 0
+                        deletions += int(deleted) if deleted != '-' else 0
+                    continue
                 
-                # Check for path-based matches (more specific)
-                path_match = any(
-                    any(path in file_path.lower() for path in topic_paths)
-                    for file_path in files_to_check
-                )
+                # Header is complete once the NUL message terminator is seen
+                if '\x00' in line:
+                    fields = ''.join(header).split('\x00', 1)[0].split('\x1f', 5)
+                    header = []
+                    files, insertions, deletions = [], 0, 0
+            
+            if fields and fields[0] not in shallow:
+                yield self._make_record(fields, files, insertions, deletions)
+            
+            await process.wait()
+            if process.returncode != 0:
+                raise Exception(f"Git log failed with exit code {process.returncode}")
+        
+        finally:
+            # Stop git early when the consumer has seen enough commits
+            await self._stop_process(process)
+    
+    @staticmethod
+    def _read_shallow(repo_dir: str) -> frozenset:
+        """Hashes of the grafted boundary commits of a shallow clone"""
+        try:
+            return frozenset((pathlib.Path(repo_dir) / 'shallow').read_text().split())
+        except FileNotFoundError:
+            return frozenset()
+    
+    @staticmethod
+    def _make_record(fields: List[str], files: List[str], insertions: int, deletions: int) -> CommitRecord:
+        """Build a CommitRecord from parsed header fields and numstat totals"""
+        commit_hash, parents, author, email, date, message = fields
+        # Authors and paths repeat across commits; interning shares one string
+        # per value and speeds up the dict lookups keyed on them
+        return CommitRecord(
+            hash=commit_hash,
+            parents=tuple(parents.split()),
+            author=sys.intern(author),
+            email=sys.intern(email),
+            date=date,
+            message=message.strip(),
+            files_changed=tuple(sys.intern(path) for path in files),
+            insertions=insertions,
+            deletions=deletions
+        )
+    
+    async def _filter_commits_by_topic_optimized(self, commits: AsyncIterator[CommitRecord], topic: str) -> List[CommitRecord]:
+        """Optimized filtering with early exit and path-based filtering"""
+        message_pattern, file_pattern = self._get_topic_patterns(topic)
+        filtered_commits = []
+        scanned = 0
+        
+        async for commit in commits:
+            scanned += 1
+            
+            # Check commit message first (fastest check); only the head of long
+            # bodies (trailers, changelogs) is scanned
+            matched = message_pattern.search(commit.message, 0, self.MAX_MESSAGE_SCAN)
+            
+            if not matched:
+                # Only look at changed files when the message did not match
+                files_to_check = commit.files_changed[:10]  # Check only first 10 files
                 
-            except Exception as e:
-                logger.debug(f"Error checking files for commit {commit.hexsha[:8]}: {e}")
-                file_match = False
-                path_match = False
+                # Check keyword and path matches in filenames with a single scan
+                matched = file_pattern.search('\n'.join(files_to_check))
             
             # Include commit if any match is found
-            if message_match or file_match or path_match:
+            if matched:
                 filtered_commits.append(commit)
+                
+                # Early exit once every returned commit is found; stops git log
+                if len(filtered_commits) >= self.MAX_RESULT_COMMITS:
+                    break
         
-        logger.info(f"Filtered to {len(filtered_commits)} topic-related commits (optimized)")
+        logger.info(f"Filtered {scanned} commits to {len(filtered_commits)} topic-related commits (optimized)")
         return filtered_commits
     
-    def _filter_commits_by_topic(self, commits, topic: str) -> List:
+    def _get_topic_patterns(self, topic: str):
+        """Get (message, file) matchers for a topic, compiling ad-hoc topics on demand"""
+        topic = topic.lower()
+        if topic in self._topic_patterns:
+            return self._topic_patterns[topic]
+        # Ad-hoc topics share the compile cache, so repeat queries skip re.compile
+        return self._compile_topic_patterns((topic,), (topic,))
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _compile_topic_patterns(keywords: Tuple[str, ...], paths: Tuple[str, ...]):
+        """Compile keyword alternations for commit messages and file paths"""
+        def token_prefix_pattern(terms: Tuple[str, ...]):
+            # Terms must start a token: non-alphanumeric characters separate
+            # tokens and so does a camelCase hump, so 'view' no longer matches
+            # 'review' while 'auth' still matches 'authentication' and
+            # 'useAuth'. The boundary is case-sensitive, only the terms are
+            # matched case-insensitively, which avoids lowercased copies of
+            # every message and file list
+            return re.compile(r'(?:(?<![A-Za-z0-9])|(?<=[a-z])(?=[A-Z]))(?i:' + '|'.join(map(re.escape, terms)) + ')')
+        
+        message_pattern = token_prefix_pattern(keywords)
+        # Filenames match on keywords or topic paths
+        file_pattern = token_prefix_pattern(tuple(dict.fromkeys(keywords + paths)))
+        return message_pattern, file_pattern
+    
+    async def _filter_commits_by_topic(self, commits: AsyncIterator[CommitRecord], topic: str) -> List[CommitRecord]:
         """Legacy method - calls optimized version"""
-        return self._filter_commits_by_topic_optimized(commits, topic)
+        return await self._filter_commits_by_topic_optimized(commits, topic)
     
-    def _structure_commits_optimized(self, commits) -> List[Dict[str, Any]]:
-        """Convert git commits to structured data with performance optimizations"""
+    async def _structure_commits_optimized(self, repo_dir: str, commits: List[CommitRecord]) -> List[Dict[str, Any]]:
+        """Convert parsed git log records to structured data with performance optimizations"""
+        # Read diff excerpts concurrently, bounding the number of git processes
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_DIFFS)
+        diffs = await asyncio.gather(*(self._diff_excerpt(repo_dir, commit, semaphore) for commit in commits))
+        
         structured = []
         
-        for commit in commits:
+        for commit, diff_text in zip(commits, diffs):
             try:
-                # Get file changes with limit
-                files_changed = list(commit.stats.files.keys())
-                files_changed_limited = files_changed[:3]  # Limit to 3 most relevant files
-                
-                # Get diff with smaller limit for performance
-                diff_text = ""
-                try:
-                    if commit.parents:
-                        diff = commit.parents[0].diff(commit)
-                        diff_str = str(diff)
-                        # Smart truncation - try to keep complete lines
-                        if len(diff_str) > self.MAX_DIFF_SIZE:
-                            truncated = diff_str[:self.MAX_DIFF_SIZE]
-                            # Find last complete line
-                            last_newline = truncated.rfind('\n')
-                            if last_newline > self.MAX_DIFF_SIZE // 2:
-                                diff_text = truncated[:last_newline] + "\n[...]"
-                            else:
-                                diff_text = truncated + "[...]"
-                        else:
-                            diff_text = diff_str
-                except Exception as e:
-                    diff_text = "Initial commit or diff unavailable"
+                files_changed = commit.files_changed
                 
                 structured.append({
-                    'hash': commit.hexsha[:8],
-                    'author': commit.author.name,
-                    'email': commit.author.email,
-                    'date': commit.committed_datetime.isoformat(),
-                    'message': commit.message.strip(),
-                    'files_changed': files_changed_limited,  # Limited for performance
+                    'hash': commit.hash[:8],
+                    'author': commit.author,
+                    'email': commit.email,
+                    'date': commit.date,
+                    'message': commit.message,
+                    'files_changed': list(files_changed[:3]),  # Limit to 3 most relevant files
                     'files_changed_count': len(files_changed),  # Keep total count
                     'diff': diff_text,
                     'stats': {
-                        'insertions': commit.stats.total['insertions'],
-                        'deletions': commit.stats.total['deletions'],
-                        'files': commit.stats.total['files']
+                        'insertions': commit.insertions,
+                        'deletions': commit.deletions,
+                        'files': len(files_changed)
                     }
                 })
                 
             except Exception as e:
-                logger.warning(f"Error processing commit {commit.hexsha[:8]}: {e}")
+                logger.warning(f"Error processing commit {commit.hash[:8]}: {e}")
                 continue
         
         return structured
     
-    def _structure_commits(self, commits) -> List[Dict[str, Any]]:
+    async def _diff_excerpt(self, repo_dir: str, commit: CommitRecord, semaphore: asyncio.Semaphore) -> str:
+        """Get a truncated diff for a commit"""
+        if not commit.parents:
+            return ""
+        
+        cache_key = (str(repo_dir), commit.hash)
+        cached = self._diff_cache.get(cache_key)
+        if cached is not None:
+            self._diff_cache.move_to_end(cache_key)
+            return cached
+        
+        try:
+            async with semaphore:
+                diff_str = await self._read_diff(repo_dir, commit.hash)
+        except Exception as e:
+            return "Initial commit or diff unavailable"
+        
+        # Smart truncation - try to keep complete lines
+        if len(diff_str) > self.MAX_DIFF_SIZE:
+            truncated = diff_str[:self.MAX_DIFF_SIZE]
+            # Find last complete line
+            last_newline = truncated.rfind('\n')
+            if last_newline > self.MAX_DIFF_SIZE // 2:
+                diff_str = truncated[:last_newline] + "\n[...]"
+            else:
+                diff_str = truncated + "[...]"
+        
+        self._diff_cache[cache_key] = diff_str
+        if len(self._diff_cache) > self.MAX_CACHED_DIFFS:
+            self._diff_cache.popitem(last=False)
+        
+        return diff_str
+    
+    async def _read_diff(self, repo_dir: str, commit_hash: str) -> str:
+        """Read the beginning of a commit's first-parent patch"""
+        process = await asyncio.create_subprocess_exec(
+            # The excerpt is only LLM context: skip rename detection and
+            # context lines so the bytes read are changed lines
+            'git', 'show', '--format=', '--no-color', '--no-renames', '-U0',
+            '--diff-merges=first-parent', commit_hash,
+            cwd=repo_dir,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        
+        try:
+            # Only a short excerpt is kept, so stop git instead of draining the
+            # patch. read(n) may return a partial pipe chunk; readexactly
+            # fills the excerpt unless the patch ends first
+            try:
+                data = await process.stdout.readexactly(self.DIFF_READ_BYTES)
+            except asyncio.IncompleteReadError as e:
+                data = e.partial
+        finally:
+            await self._stop_process(process)
+        
+        if not data and process.returncode != 0:
+            raise Exception(f"Git show failed with exit code {process.returncode}")
+        
+        return data.decode('utf-8', 'replace')
+    
+    @staticmethod
+    async def _stop_process(process: asyncio.subprocess.Process) -> None:
+        """Kill a git process if it is still running and reap it"""
+        if process.returncode is None:
+            # Signal directly: Process.kill() polls first, which reaps a git that
+            # already exited behind the child watcher's back (reported as 255)
+            try:
+                os.kill(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass  # Exited on its own in the meantime
+        await process.wait()
+    
+    async def _structure_commits(self, repo_dir: str, commits: List[CommitRecord]) -> List[Dict[str, Any]]:
         """Legacy method - calls optimized version"""
-        return self._structure_commits_optimized(commits)
+        return await self._structure_commits_optimized(repo_dir, commits)
     
     def create_timeline(self, commits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Create timeline data for visualization"""
@@ -211,108 +474,105 @@ class GitAnalyzer:
         return timeline
     
     def generate_visualization_data(self, commits: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Generate data for Q&A visualizations"""
-        return {
-            'ownership': self._calculate_ownership(commits),
-            'hotspots': self._calculate_hotspots(commits),
-            'complexity_trend': self._calculate_complexity_trend(commits),
-            'evolution': self._extract_evolution_moments(commits)
-        }
-    
-    def _calculate_ownership(self, commits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Aggregate commit and change data by author"""
-        ownership = {}
+        """Generate data for Q&A visualizations in a single pass over the commits"""
+        ownership = defaultdict(_OwnerStats)
+        hotspots = defaultdict(_HotspotStats)
+        trends = defaultdict(_TrendStats)
+        significant_commits = []
         
         for commit in commits:
-            author = commit['author']
-            if author not in ownership:
-                ownership[author] = {
-                    'author': author,
-                    'commits': 0,
-                    'lines_changed': 0,
-                    'first_commit': commit['date'],
-                    'last_commit': commit['date']
-                }
+            stats = commit['stats']
+            date = commit['date']
+            files_changed = commit['files_changed']
+            total_changes = stats['insertions'] + stats['deletions']
             
-            ownership[author]['commits'] += 1
-            ownership[author]['lines_changed'] += commit['stats']['insertions'] + commit['stats']['deletions']
+            # Ownership: aggregate commit and change data by author
+            owner = ownership[commit['author']]
+            owner.commits += 1
+            owner.lines_changed += total_changes
             
             # Update date range
-            if commit['date'] < ownership[author]['first_commit']:
-                ownership[author]['first_commit'] = commit['date']
-            if commit['date'] > ownership[author]['last_commit']:
-                ownership[author]['last_commit'] = commit['date']
+            if date < owner.first_commit:
+                owner.first_commit = date
+            if date > owner.last_commit:
+                owner.last_commit = date
+            
+            # Hotspots: approximate lines changed per file (total stats / number of files)
+            if files_changed:
+                approx_lines = total_changes // len(files_changed)
+                for file_path in files_changed:
+                    hotspot = hotspots[file_path]
+                    hotspot.commits_touching += 1
+                    hotspot.lines_changed += approx_lines
+            
+            # Complexity trend: group by month (YYYY-MM format). Dates are git's
+            # strict ISO 8601 (%cI), so the month is the first 7 characters
+            trend = trends[date[:7]]
+            trend.lines_added += stats['insertions']
+            trend.lines_deleted += stats['deletions']
+            trend.files_touched += stats['files']
+            
+            # Evolution: significant if many files changed or contains key terms
+            has_keywords = self.EVOLUTION_RE.search(commit['message'][:self.MAX_MESSAGE_SCAN]) is not None
+            
+            if total_changes > 20 or has_keywords or stats['files'] > 3:
+                significant_commits.append(commit)
         
+        return {
+            'ownership': self._calculate_ownership(ownership),
+            'hotspots': self._calculate_hotspots(hotspots),
+            'complexity_trend': self._calculate_complexity_trend(trends),
+            'evolution': self._extract_evolution_moments(significant_commits)
+        }
+    
+    def _calculate_ownership(self, ownership: Dict[str, _OwnerStats]) -> List[Dict[str, Any]]:
+        """Rank aggregated author data"""
         # Sort by commits count (descending)
-        return sorted(ownership.values(), key=lambda x: x['commits'], reverse=True)
+        ranked = sorted(ownership.items(), key=lambda x: x[1].commits, reverse=True)
+        return [
+            {
+                'author': author,
+                'commits': owner.commits,
+                'lines_changed': owner.lines_changed,
+                'first_commit': owner.first_commit,
+                'last_commit': owner.last_commit
+            }
+            for author, owner in ranked
+        ]
     
-    def _calculate_hotspots(self, commits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _calculate_hotspots(self, hotspots: Dict[str, _HotspotStats]) -> List[Dict[str, Any]]:
         """Find files with most changes (hotspots)"""
-        hotspots = {}
-        
-        for commit in commits:
-            for file_path in commit['files_changed']:
-                if file_path not in hotspots:
-                    hotspots[file_path] = {
-                        'file': file_path,
-                        'commits_touching': 0,
-                        'lines_changed': 0
-                    }
-                
-                hotspots[file_path]['commits_touching'] += 1
-                # Approximate lines changed per file (total stats / number of files)
-                files_count = len(commit['files_changed'])
-                if files_count > 0:
-                    approx_lines = (commit['stats']['insertions'] + commit['stats']['deletions']) // files_count
-                    hotspots[file_path]['lines_changed'] += approx_lines
-        
-        # Sort by commits touching (descending) and return top 10
-        return sorted(hotspots.values(), key=lambda x: x['commits_touching'], reverse=True)[:10]
+        # Top 10 by commits touching (descending)
+        top = heapq.nlargest(10, hotspots.items(), key=lambda x: x[1].commits_touching)
+        return [
+            {
+                'file': file_path,
+                'commits_touching': hotspot.commits_touching,
+                'lines_changed': hotspot.lines_changed
+            }
+            for file_path, hotspot in top
+        ]
     
-    def _calculate_complexity_trend(self, commits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Calculate monthly complexity trends"""
-        trends = {}
-        
-        for commit in commits:
-            # Group by month (YYYY-MM format)
-            date_obj = datetime.fromisoformat(commit['date'].replace('Z', '+00:00'))
-            period = date_obj.strftime('%Y-%m')
-            
-            if period not in trends:
-                trends[period] = {
-                    'period': period,
-                    'lines_added': 0,
-                    'lines_deleted': 0,
-                    'files_touched': 0
-                }
-            
-            trends[period]['lines_added'] += commit['stats']['insertions']
-            trends[period]['lines_deleted'] += commit['stats']['deletions']
-            trends[period]['files_touched'] += commit['stats']['files']
-        
+    def _calculate_complexity_trend(self, trends: Dict[str, _TrendStats]) -> List[Dict[str, Any]]:
+        """Order monthly complexity trends"""
         # Sort by period (chronological)
-        return sorted(trends.values(), key=lambda x: x['period'])
+        return [
+            {
+                'period': period,
+                'lines_added': trend.lines_added,
+                'lines_deleted': trend.lines_deleted,
+                'files_touched': trend.files_touched
+            }
+            for period, trend in sorted(trends.items())
+        ]
     
-    def _extract_evolution_moments(self, commits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Extract key evolution moments from commits"""
+    def _extract_evolution_moments(self, significant_commits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Extract key evolution moments from significant commits"""
         evolution = []
         
-        # Take significant commits (high change count or key words)
-        significant_commits = []
-        
-        for commit in commits:
-            # Consider significant if many files changed or contains key terms
-            total_changes = commit['stats']['insertions'] + commit['stats']['deletions']
-            has_keywords = any(word in commit['message'].lower() 
-                             for word in ['add', 'implement', 'introduce', 'refactor', 'remove'])
-            
-            if total_changes > 20 or has_keywords or commit['stats']['files'] > 3:
-                significant_commits.append(commit)
-        
         # Limit to top 8 most significant and sort by date
-        significant_commits = sorted(significant_commits, 
-                                   key=lambda x: x['stats']['insertions'] + x['stats']['deletions'], 
-                                   reverse=True)[:8]
+        significant_commits = heapq.nlargest(8, significant_commits,
+                                             key=lambda x: x['stats']['insertions'] + x['stats']['deletions'])
         significant_commits.sort(key=lambda x: x['date'])
         
         for commit in significant_commits:
@@ -326,7 +586,9 @@ class GitAnalyzer:
         
         return evolution
     
-    def _extract_commit_title(self, message: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _extract_commit_title(message: str) -> str:
         """Extract a short title from commit message"""
         lines = message.strip().split('\n')
         title = lines[0]
@@ -336,9 +598,3 @@ class GitAnalyzer:
             title = title[:47] + "..."
         
         return title
-    
-    def _cleanup(self):
-        """Clean up temporary directory"""
-        if self.temp_dir and os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir, ignore_errors=True)
-            logger.info("Cleaned up temporary directory")
@@ -1,16 +1,152 @@
 
 import os
+import re
+import time
 import logging
-from typing import List, Dict, Any
+import asyncio
+import functools
+from collections import OrderedDict, Counter
+import orjson
+import httpx
+import numpy as np
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 import openai
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
+from semantic_cache import SemanticCache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
 logger = logging.getLogger(__name__)
 
+# Rough characters per token, used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+# Q&A response parsing: section headers (with any text on the header line),
+# evidence lines ('<hash> — "<description>"'), and the SUMMARY:/ANSWER:
+# halves of a combined response
+QA_SECTION_RE = re.compile(r'^[ \t]*(Answer|Summary:|Key Evidence)(.*)$', re.MULTILINE)
+EVIDENCE_RE = re.compile(r'^[ \t]*(\S.*?)[ \t]*—[ \t]*(.*?)[ \t]*$', re.MULTILINE)
+COMBINED_RE = re.compile(r'\s*(?:SUMMARY:)?(.*?)(?:ANSWER:(.*))?\Z', re.DOTALL)
+
+# System prompts are constant, so they and their message dicts are built once
+SYSTEM_PROMPT = """You are a software architect. Provide an EXTREMELY BRIEF summary.
+
+Use EXACTLY 3-4 short bullet points:
+• Initial: What was built first
+• Changes: Key updates made  
+• Current: How it works now
+• Impact: Main benefit
+
+Each bullet point should be ONE sentence only. No explanations or details."""
+
+QA_SYSTEM_PROMPT = """You are a concise software historian. Given git commits and diffs, you will answer the user's question about code evolution.
+
+Be evidence-based. When you infer motivation, cite the commit(s) that support it.
+If evidence is weak, say "Insufficient evidence" and offer the most likely explanation clearly marked as a hypothesis.
+
+Keep prose brief (executive summary style). Focus on the Topic if provided; otherwise answer broadly.
+
+Output format:
+Answer
+Summary: <2-4 sentences answering the question>
+
+Key Evidence
+<hash> — "<commit message or quoted fragment>"
+<hash> — "<commit message or quoted fragment>"
+
+Do not invent commit hashes or authors; only use what's provided."""
+
+COMBINED_SYSTEM_PROMPT = """You are a software architect. Keep responses EXTREMELY SHORT.
+
+For the SUMMARY: EXACTLY 3-4 bullet points (one sentence each):
+• Initial: What was built first
+• Changes: Key updates made
+• Current: How it works now  
+• Impact: Main benefit
+
+For the ANSWER: ONE sentence with evidence:
+Answer: <one sentence only>
+Key Evidence:
+<hash> — "<commit message>"
+
+Be ultra-brief."""
+
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+QA_SYSTEM_MESSAGE = {"role": "system", "content": QA_SYSTEM_PROMPT}
+COMBINED_SYSTEM_MESSAGE = {"role": "system", "content": COMBINED_SYSTEM_PROMPT}
+
+# Tokenizer for the completion model. Its encoding file is downloaded on
+# first use, so it is loaded off the event loop and trimming falls back to
+# a character estimate until it is ready
+_encoding = None
+_encoding_task: Optional[asyncio.Task] = None
+_encoding_retry_at = 0.0
+TOKENIZER_RETRY_SECONDS = 300
+
+async def _load_encoding() -> None:
+    global _encoding, _encoding_retry_at
+    try:
+        _encoding = await asyncio.to_thread(tiktoken.encoding_for_model, "gpt-4o")
+    except Exception as e:
+        # Not memoized; retried after TOKENIZER_RETRY_SECONDS
+        _encoding_retry_at = time.monotonic() + TOKENIZER_RETRY_SECONDS
+        logger.warning(f"Tokenizer unavailable, trimming by characters: {e}")
+        return
+    # Drop excerpts that were trimmed by the character estimate
+    _trim.cache_clear()
+
+def load_tokenizer() -> None:
+    """Start loading the tokenizer in the background unless it is loaded or loading"""
+    global _encoding_task
+    if tiktoken is None or _encoding is not None:
+        return
+    if _encoding_task is not None and not _encoding_task.done():
+        return
+    if time.monotonic() < _encoding_retry_at:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _encoding_task = loop.create_task(_load_encoding())
+
+@functools.lru_cache(maxsize=2048)
+def _trim(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens"""
+    encoding = _encoding
+    if encoding is None:
+        load_tokenizer()
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
 class GPTSummarizer:
     """Handles GPT-based commit summarization"""
     
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    FALLBACK_MODEL = "gpt-4o"  # Retry model when the summary model's output is unusable
+    SUMMARY_CHUNK_SIZE = 10  # Commits per summary prompt; larger sets are map-reduced
+    
+    # One pooled HTTP/2 client shared by every summarizer, so requests reuse
+    # warm TLS connections to the API instead of handshaking per instance
+    _client: AsyncOpenAI = None
+    
+    # Results shared by every summarizer; only touched from the event loop
+    _cache = SemanticCache()
+    
+    # Rendered commit sections of prompts, keyed by prompt kind and commit
+    # hashes, so repeat questions about an analysis skip re-rendering
+    MAX_CACHED_PROMPTS = 256
+    _prompt_bodies: 'OrderedDict[Tuple[str, ...], str]' = OrderedDict()
+    
     def __init__(self):
         # Load environment variables from .env.local file
         import os.path
@@ -21,42 +157,131 @@ class GPTSummarizer:
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
-        self.client = AsyncOpenAI(api_key=api_key)
+        if GPTSummarizer._client is None:
+            GPTSummarizer._client = AsyncOpenAI(
+                api_key=api_key,
+                timeout=30,
+                # Sized for concurrent map-reduce, batch and embedding calls
+                http_client=httpx.AsyncClient(
+                    http2=True,
+                    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+                )
+            )
+        self.client = GPTSummarizer._client
+        # Outputs are a few bullets or one sentence, which the small model handles
+        self.model = os.environ.get("SUMMARY_MODEL", "gpt-4o-mini")
         self.temperature = 0.3
         self.max_completion_tokens = 300  # Much smaller for brief summaries
         self.max_qa_tokens = 250  # Smaller for concise Q&A
     
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close the shared API client and its connection pool"""
+        if cls._client is not None:
+            client, cls._client = cls._client, None
+            await client.close()
+    
     async def summarize_commits(self, commits: List[Dict[str, Any]], topic: str) -> str:
         """Generate GPT summary of commits for a specific topic"""
+        cache_key, _ = self._cache_keys("summary", commits, topic)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logger.info("Summary served from cache")
+            return cached
+        
         try:
-            # Build optimized prompt from commits
-            prompt = self._build_prompt_optimized(commits, topic)
-            
             logger.info(f"Sending {len(commits)} commits to GPT for summarization (optimized)")
             
-            # Call GPT API with optimized settings
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                max_completion_tokens=self.max_completion_tokens
+            summary = await self._complete_checked(
+                await self._summary_messages(commits, topic),
+                self.max_completion_tokens,
+                "•"
             )
-            
-            summary = response.choices[0].message.content
             logger.info(f"GPT summarization completed. Summary length: {len(summary) if summary else 0}")
             
             if not summary or len(summary.strip()) == 0:
                 logger.warning("GPT returned empty summary, using fallback")
                 return self._fallback_summary(commits, topic)
             
+            self._cache.put(cache_key, "", None, summary)
             return summary
             
         except Exception as e:
             logger.error(f"GPT summarization failed: {e}")
             return self._fallback_summary(commits, topic)
     
+    async def _summarize_chunk(self, commits: List[Dict[str, Any]], topic: str) -> str:
+        """Summarize up to SUMMARY_CHUNK_SIZE commits in one GPT call"""
+        # Build optimized prompt from commits
+        prompt = self._build_prompt_optimized(commits, topic)
+        
+        # Call GPT API with optimized settings
+        return await self._complete_checked(
+            [
+                SYSTEM_MESSAGE,
+                {"role": "user", "content": prompt}
+            ],
+            self.max_completion_tokens,
+            "•"
+        )
+    
+    async def _summary_messages(self, commits: List[Dict[str, Any]], topic: str) -> List[Dict[str, str]]:
+        """Messages for the final summary call, map-reducing commit sets larger than one prompt"""
+        size = self.SUMMARY_CHUNK_SIZE
+        if len(commits) <= size:
+            return [
+                SYSTEM_MESSAGE,
+                {"role": "user", "content": self._build_prompt_optimized(commits, topic)}
+            ]
+        
+        # Summarize chunks concurrently; the returned messages merge them
+        chunks = [commits[i:i + size] for i in range(0, len(commits), size)]
+        partials = await asyncio.gather(*(self._summarize_chunk(chunk, topic) for chunk in chunks))
+        
+        # Commits are newest first, so list the partial summaries oldest first
+        parts = [f"Topic: {topic}\n\nPartial summaries of {len(commits)} commits, oldest period first:\n"]
+        for period, partial in enumerate(reversed(partials), 1):
+            parts.append(f"\nPeriod {period}:\n{partial.strip()}\n")
+        parts.append("\nCombine these into one structured summary of how this feature evolved:")
+        
+        return [
+            SYSTEM_MESSAGE,
+            {"role": "user", "content": ''.join(parts)}
+        ]
+    
+    async def stream_summary(self, commits: List[Dict[str, Any]], topic: str) -> AsyncIterator[str]:
+        """Yield the GPT summary of commits as it is generated; raises if it fails midway"""
+        cache_key, _ = self._cache_keys("summary", commits, topic)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logger.info("Summary served from cache")
+            yield cached
+            return
+        
+        parts = []
+        try:
+            logger.info(f"Streaming GPT summary for {len(commits)} commits")
+            
+            # Larger sets stream the merge step, after the chunk summaries
+            messages = await self._summary_messages(commits, topic)
+            async for text in self.stream_completion(messages, self.max_completion_tokens):
+                parts.append(text)
+                yield text
+        except Exception as e:
+            logger.error(f"GPT summary stream failed: {e}")
+            # Part of the summary was already sent and cannot be replaced, so
+            # let the caller report the failure; the fragment is not cached
+            if parts:
+                raise
+        
+        summary = ''.join(parts)
+        if summary.strip():
+            self._cache.put(cache_key, "", None, summary)
+        elif not parts:
+            # Nothing was sent yet, so the fallback can stand in for the summary
+            logger.warning("GPT returned empty summary, using fallback")
+            yield self._fallback_summary(commits, topic)
+    
     async def summarize_and_qa_batch(self, commits: List[Dict[str, Any]], topic: str, question: str = None) -> Dict[str, Any]:
         """Batch processing for summary and Q&A in a single call"""
         try:
@@ -64,6 +289,24 @@ class GPTSummarizer:
             if not question:
                 question = f"How did {topic} evolve in this codebase?"
             
+            # A combined prompt only fits one chunk of commits; larger sets get
+            # the map-reduced summary alongside a separate Q&A call
+            if len(commits) > self.SUMMARY_CHUNK_SIZE:
+                summary, qa_data = await asyncio.gather(
+                    self.summarize_commits(commits, topic),
+                    self.process_qa(question, commits, topic, {})
+                )
+                return {"summary": summary, "qa_data": qa_data}
+            
+            # Exact matches only: the batch question is usually the default
+            # one, and a similarity lookup would put an embedding round trip
+            # in front of every miss
+            cache_key, scope = self._cache_keys("batch", commits, topic, question)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info("Batch summary + Q&A served from cache")
+                return {"summary": cached["summary"], "qa_data": dict(cached["qa_data"])}
+            
             # Build combined prompt
             summary_prompt = self._build_prompt_optimized(commits, topic)
             qa_prompt = self._build_qa_prompt_optimized(question, topic, commits)
@@ -85,17 +328,20 @@ ANSWER:
             
             logger.info(f"Batch processing summary + Q&A for {len(commits)} commits")
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": self._get_combined_system_prompt()},
+            content = await self._complete_checked(
+                [
+                    COMBINED_SYSTEM_MESSAGE,
                     {"role": "user", "content": combined_prompt}
                 ],
-                max_completion_tokens=self.max_completion_tokens + 100  # Slightly more for combined
+                self.max_completion_tokens + 100,  # Slightly more for combined
+                "ANSWER:"
             )
+            result = self._parse_combined_response(content, commits)
             
-            content = response.choices[0].message.content
-            return self._parse_combined_response(content, commits)
+            # Malformed responses are not worth replaying
+            if "ANSWER:" in content:
+                self._cache.put(cache_key, scope, None, {"summary": result["summary"], "qa_data": dict(result["qa_data"])})
+            return result
             
         except Exception as e:
             logger.error(f"Batch GPT processing failed: {e}")
@@ -104,32 +350,58 @@ ANSWER:
             qa_data = self._fallback_qa_response(question or f"How did {topic} evolve?", commits, {})
             return {"summary": summary, "qa_data": qa_data}
     
-    def _get_combined_system_prompt(self) -> str:
-        """System prompt for combined summary + Q&A processing"""
-        return """You are a software architect. Keep responses EXTREMELY SHORT.
-
-For the SUMMARY: EXACTLY 3-4 bullet points (one sentence each):
-• Initial: What was built first
-• Changes: Key updates made
-• Current: How it works now  
-• Impact: Main benefit
-
-For the ANSWER: ONE sentence with evidence:
-Answer: <one sentence only>
-Key Evidence:
-<hash> — "<commit message>"
-
-Be ultra-brief."""
+    async def stream_completion(self, messages: List[Dict[str, str]], max_tokens: int, model: str = None) -> AsyncIterator[str]:
+        """Yield completion text as GPT streams it"""
+        stream = await self.client.chat.completions.create(
+            model=model or self.model,
+            messages=messages,
+            max_completion_tokens=max_tokens,
+            stream=True
+        )
+        
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def _complete(self, messages: List[Dict[str, str]], max_tokens: int, model: str = None) -> str:
+        """Collect a streamed completion into a single string"""
+        return ''.join([part async for part in self.stream_completion(messages, max_tokens, model)])
+    
+    async def _complete_checked(self, messages: List[Dict[str, str]], max_tokens: int, marker: str) -> str:
+        """Complete with the summary model, retrying once with the fallback model if the expected marker is missing"""
+        content = await self._complete(messages, max_tokens)
+        if marker not in content and self.model != self.FALLBACK_MODEL:
+            logger.warning(f"{self.model} response missing '{marker}', retrying with {self.FALLBACK_MODEL}")
+            content = await self._complete(messages, max_tokens, self.FALLBACK_MODEL)
+        return content
+    
+    def _cache_keys(self, kind: str, commits: List[Dict[str, Any]], topic: str, question: str = "") -> Tuple[str, str]:
+        """Exact cache key and similarity scope for a request over these commits"""
+        scope = SemanticCache.make_key(kind, *(commit['hash'] for commit in commits))
+        return SemanticCache.make_key(scope, topic or "", question), scope
+    
+    async def _embed_query(self, topic: str, question: str) -> Optional[np.ndarray]:
+        """Embed a question for similarity lookup; None if embedding fails"""
+        try:
+            response = await self.client.embeddings.create(
+                model=self.EMBEDDING_MODEL,
+                input=f"{topic}: {question}" if topic else question
+            )
+        except Exception as e:
+            logger.warning(f"Question embedding failed, using exact cache only: {e}")
+            return None
+        
+        vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
     
     def _parse_combined_response(self, content: str, commits: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Parse combined summary + Q&A response"""
         try:
-            parts = content.split("ANSWER:")
-            summary_part = parts[0].replace("SUMMARY:", "").strip()
+            match = COMBINED_RE.match(content)
+            summary_part = match.group(1).strip()
             
-            if len(parts) > 1:
-                qa_part = parts[1].strip()
-                qa_data = self._parse_qa_response(qa_part, commits)
+            if match.group(2) is not None:
+                qa_data = self._parse_qa_response(match.group(2).strip(), commits)
             else:
                 # Fallback if format is not as expected
                 qa_data = {"answer": "Combined processing format error", "evidence": []}
@@ -145,41 +417,51 @@ Be ultra-brief."""
                 "qa_data": {"answer": "Parsing error occurred", "evidence": []}
             }
     
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for GPT"""
-        return """You are a software architect. Provide an EXTREMELY BRIEF summary.
-
-Use EXACTLY 3-4 short bullet points:
-• Initial: What was built first
-• Changes: Key updates made  
-• Current: How it works now
-• Impact: Main benefit
-
-Each bullet point should be ONE sentence only. No explanations or details."""
-    
     def _build_prompt_optimized(self, commits: List[Dict[str, Any]], topic: str) -> str:
         """Build optimized prompt with reduced token usage"""
-        prompt = f"Topic: {topic}\n\nCommits ({len(commits)} total):\n"
+        # Limit to 10 commits; the commit section is reused across requests
+        body = self._prompt_body("summary", commits[:10], self._summary_commit_lines)
+        return (f"Topic: {topic}\n\nCommits ({len(commits)} total):\n"
+                f"{body}\nProvide a structured summary of how this feature evolved:")
+    
+    @staticmethod
+    def _summary_commit_lines(commits: List[Dict[str, Any]]) -> str:
+        """Render commits for the summary prompt"""
+        # Collect parts and join once instead of re-copying the prompt per line
+        parts = []
         
-        # Limit to 10 commits and reduce content per commit
-        for commit in commits[:10]:
-            prompt += f"- {commit['hash']}: {commit['message'][:150]}\n"
-            prompt += f"  {commit['author']} | {commit['date'][:10]}\n"
+        # Reduce content per commit; excerpts are capped in tokens, which is
+        # what the model bills and limits on
+        for commit in commits:
+            parts.append(f"- {commit['hash']}: {_trim(commit['message'], 40)}\n")
+            parts.append(f"  {commit['author']} | {commit['date'][:10]}\n")
             
             # Show only most relevant files
             files_to_show = commit.get('files_changed', [])[:3]
             if files_to_show:
-                prompt += f"  Files: {', '.join(files_to_show)}\n"
+                parts.append(f"  Files: {', '.join(files_to_show)}\n")
             
             # Shorter diff excerpts
             if commit.get('diff') and len(commit['diff'].strip()) > 10:
-                diff_excerpt = commit['diff'][:150].strip()
+                diff_excerpt = _trim(commit['diff'], 40).strip()
                 if diff_excerpt:
-                    prompt += f"  Changes: {diff_excerpt}...\n"
-            prompt += "\n"
+                    parts.append(f"  Changes: {diff_excerpt}...\n")
+            parts.append("\n")
         
-        prompt += "\nProvide a structured summary of how this feature evolved:"
-        return prompt
+        return ''.join(parts)
+    
+    def _prompt_body(self, kind: str, commits: List[Dict[str, Any]], render) -> str:
+        """Return the rendered commit section of a prompt, reusing it for the same commits"""
+        key = (kind, *(commit['hash'] for commit in commits))
+        body = self._prompt_bodies.get(key)
+        if body is not None:
+            self._prompt_bodies.move_to_end(key)
+            return body
+        
+        body = self._prompt_bodies[key] = render(commits)
+        if len(self._prompt_bodies) > self.MAX_CACHED_PROMPTS:
+            self._prompt_bodies.popitem(last=False)
+        return body
     
     def _build_prompt(self, commits: List[Dict[str, Any]], topic: str) -> str:
         """Legacy method - calls optimized version"""
@@ -187,51 +469,66 @@ Each bullet point should be ONE sentence only. No explanations or details."""
     
     def _fallback_summary(self, commits: List[Dict[str, Any]], topic: str) -> str:
         """Provide fallback summary when GPT fails"""
-        summary = f"## Evolution Summary: {topic.title()}\n\n"
-        summary += f"**Analysis Period**: {len(commits)} commits analyzed\n\n"
+        parts = [
+            f"## Evolution Summary: {topic.title()}\n\n",
+            f"**Analysis Period**: {len(commits)} commits analyzed\n\n"
+        ]
         
         if commits:
-            earliest = min(commits, key=lambda x: x['date'])
-            latest = max(commits, key=lambda x: x['date'])
+            # Date range and contributor counts in a single pass
+            earliest = latest = commits[0]['date']
+            authors = Counter()
+            for commit in commits:
+                date = commit['date']
+                if date < earliest:
+                    earliest = date
+                if date > latest:
+                    latest = date
+                authors[commit['author']] += 1
             
-            summary += f"**Timeline**: {earliest['date'][:10]} to {latest['date'][:10]}\n\n"
+            parts.append(f"**Timeline**: {earliest[:10]} to {latest[:10]}\n\n")
             
             # Key contributors
-            authors = {}
-            for commit in commits:
-                authors[commit['author']] = authors.get(commit['author'], 0) + 1
-            
-            top_authors = sorted(authors.items(), key=lambda x: x[1], reverse=True)[:3]
-            summary += f"**Key Contributors**: {', '.join([f'{author} ({count} commits)' for author, count in top_authors])}\n\n"
+            top_authors = authors.most_common(3)
+            parts.append(f"**Key Contributors**: {', '.join([f'{author} ({count} commits)' for author, count in top_authors])}\n\n")
             
             # Major changes
-            summary += "**Major Changes**:\n"
+            parts.append("**Major Changes**:\n")
             for commit in commits[:5]:
-                summary += f"- {commit['date'][:10]}: {commit['message'][:100]}\n"
+                parts.append(f"- {commit['date'][:10]}: {commit['message'][:100]}\n")
         
-        summary += "\n*Note: This is a fallback summary. Full AI analysis was unavailable.*"
+        parts.append("\n*Note: This is a fallback summary. Full AI analysis was unavailable.*")
         
-        return summary
+        return ''.join(parts)
     
     async def process_qa(self, question: str, commits: List[Dict[str, Any]], topic: str, visualizations: Dict[str, Any]) -> Dict[str, Any]:
         """Process Q&A request using the qa-feature-ui.md template"""
         try:
+            # Exact repeat first, then a similar question about the same commits
+            cache_key, scope = self._cache_keys("qa", commits, topic, question)
+            cached = self._cache.get(cache_key)
+            embedding = None
+            if cached is None:
+                embedding = await self._embed_query(topic, question)
+                cached = self._cache.nearest(scope, embedding)
+            if cached is not None:
+                logger.info(f"Q&A served from cache: {question}")
+                return {**cached, "visualizations": visualizations}
+            
             # Build Q&A prompt
             qa_prompt = self._build_qa_prompt(question, topic, commits)
             
             logger.info(f"Processing Q&A question: {question}")
             
             # Call GPT API with Q&A system prompt
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": self._get_qa_system_prompt()},
+            content = await self._complete_checked(
+                [
+                    QA_SYSTEM_MESSAGE,
                     {"role": "user", "content": qa_prompt}
                 ],
-                max_completion_tokens=self.max_qa_tokens
+                self.max_qa_tokens,
+                "Answer"
             )
-            
-            content = response.choices[0].message.content
             logger.info(f"GPT Q&A completed. Response length: {len(content) if content else 0}")
             
             if not content or len(content.strip()) == 0:
@@ -240,6 +537,9 @@ Each bullet point should be ONE sentence only. No explanations or details."""
             
             # Parse response into answer and evidence
             parsed_qa = self._parse_qa_response(content, commits)
+            # Malformed responses are not worth replaying
+            if parsed_qa["answer"]:
+                self._cache.put(cache_key, scope, embedding, dict(parsed_qa))
             
             # Add visualization data
             parsed_qa["visualizations"] = visualizations
@@ -252,46 +552,45 @@ Each bullet point should be ONE sentence only. No explanations or details."""
             logger.error(f"Q&A processing failed: {e}")
             return self._fallback_qa_response(question, commits, visualizations)
     
-    def _get_qa_system_prompt(self) -> str:
-        """Get system prompt for Q&A processing based on qa-feature-ui.md"""
-        return """You are a concise software historian. Given git commits and diffs, you will answer the user's question about code evolution.
-
-Be evidence-based. When you infer motivation, cite the commit(s) that support it.
-If evidence is weak, say "Insufficient evidence" and offer the most likely explanation clearly marked as a hypothesis.
-
-Keep prose brief (executive summary style). Focus on the Topic if provided; otherwise answer broadly.
-
-Output format:
-Answer
-Summary: <2-4 sentences answering the question>
-
-Key Evidence
-<hash> — "<commit message or quoted fragment>"
-<hash> — "<commit message or quoted fragment>"
-
-Do not invent commit hashes or authors; only use what's provided."""
-    
     def _build_qa_prompt_optimized(self, question: str, topic: str, commits: List[Dict[str, Any]]) -> str:
         """Build optimized Q&A prompt with reduced token usage"""
-        prompt = f"Question: {question}\n"
+        parts = [f"Question: {question}\n"]
         
         if topic:
-            prompt += f"Topic: {topic}\n"
+            parts.append(f"Topic: {topic}\n")
         
-        prompt += "\nKey Commits:\n"
+        parts.append("\nKey Commits (one JSON object per line):\n")
         
-        # Limit to 8 commits and use compact format
-        for commit in commits[:8]:
-            prompt += f"{commit['hash']}: {commit['message'][:100]}\n"
-            prompt += f"  By {commit['author']} on {commit['date'][:10]}\n"
+        # Limit to 8 commits; the commit section is reused across questions
+        parts.append(self._prompt_body("qa", commits[:8], self._qa_commit_lines))
+        
+        return ''.join(parts)
+    
+    @staticmethod
+    def _qa_commit_lines(commits: List[Dict[str, Any]]) -> str:
+        """Render commits for the Q&A prompt as JSON lines"""
+        parts = []
+        
+        # JSON lines escape newlines and quotes in messages and diffs, which
+        # broke the old hand-built format
+        for commit in commits:
+            entry = {
+                'hash': commit['hash'],
+                'author': commit['author'],
+                'date': commit['date'][:10],
+                'message': _trim(commit['message'], 25),
+                'files': commit.get('files_changed', [])[:3]
+            }
             
             # Only include diff if it's meaningful
             diff = commit.get('diff', '').strip()
             if diff and len(diff) > 20:
-                prompt += f"  Key changes: {diff[:120]}...\n"
-            prompt += "\n"
+                entry['diff'] = _trim(diff, 30)
+            
+            parts.append(orjson.dumps(entry).decode())
+            parts.append("\n")
         
-        return prompt
+        return ''.join(parts)
     
     def _build_qa_prompt(self, question: str, topic: str, commits: List[Dict[str, Any]]) -> str:
         """Legacy method - calls optimized version"""
@@ -299,39 +598,26 @@ Do not invent commit hashes or authors; only use what's provided."""
     
     def _parse_qa_response(self, content: str, commits: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Parse GPT Q&A response into structured format"""
-        lines = content.strip().split('\n')
-        
-        answer = ""
+        answer_parts = []
         evidence = []
         
-        current_section = None
-        
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith("Answer") or line.startswith("Summary:"):
-                current_section = "answer"
-                if line.startswith("Summary:"):
-                    answer += line[8:].strip() + " "
-                continue
-            elif line.startswith("Key Evidence"):
-                current_section = "evidence"
-                continue
-            elif line and current_section == "answer":
-                answer += line + " "
-            elif line and current_section == "evidence" and "—" in line:
-                # Parse evidence line: "hash — description"
-                parts = line.split("—", 1)
-                if len(parts) == 2:
-                    hash_part = parts[0].strip()
-                    description = parts[1].strip().strip('"')
-                    evidence.append({
-                        "hash": hash_part,
-                        "description": description
-                    })
+        sections = list(QA_SECTION_RE.finditer(content))
+        for i, section in enumerate(sections):
+            end = sections[i + 1].start() if i + 1 < len(sections) else len(content)
+            body = content[section.end():end]
+            
+            if section.group(1) == "Key Evidence":
+                evidence.extend(
+                    {"hash": hash_part, "description": description.strip('"')}
+                    for hash_part, description in EVIDENCE_RE.findall(body)
+                )
+            else:
+                # Text may follow the header on the same line ('Answer: ...')
+                answer_parts.append(section.group(2).lstrip(':'))
+                answer_parts.append(body)
         
         return {
-            "answer": answer.strip(),
+            "answer": ' '.join(' '.join(answer_parts).split()),
             "evidence": evidence
         }
     
@@ -1,26 +1,74 @@
 
 import os
 import logging
-import hashlib
+import heapq
+import functools
 import time
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import asyncio
+import orjson
+import xxhash
 
 from git_utils import GitAnalyzer
-from gpt_summarizer import GPTSummarizer
+from gpt_summarizer import GPTSummarizer, load_tokenizer
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Repository cache to avoid re-cloning
+# Repository cache to avoid re-cloning. Shared across workers and restarts
+# through Redis when REDIS_URL is set, otherwise kept in process
 repo_cache: Dict[str, Dict[str, Any]] = {}
+# (expires_at, key) min-heap; entries expire lazily on access and writes
+cache_expiry_heap: List[Tuple[float, str]] = []
 CACHE_EXPIRY_SECONDS = 1800  # 30 minutes
+NEGATIVE_CACHE_SECONDS = 300  # "No commits found" results expire sooner
+
+# Shared by all requests: GitAnalyzer is stateless and GPTSummarizer reuses
+# one API client
+git_analyzer = GitAnalyzer()
+
+@functools.lru_cache(maxsize=None)
+def get_gpt_summarizer() -> GPTSummarizer:
+    """Create the summarizer on first use, so a missing API key fails requests rather than startup"""
+    return GPTSummarizer()
+
+# Follow-up questions answered in the background after /analyze. These are
+# the suggested questions in src/components/QASection.tsx, verbatim, so a
+# click on one is an exact cache hit; keep the two lists in sync. Answers
+# are cached by the worker that served /analyze
+FOLLOW_UP_QUESTIONS = [
+    "Why was this pattern introduced?",
+    "How did {topic} evolve over time?",
+    "What were the major architectural changes?",
+    "Who were the key contributors to this feature?",
+    "When did the most significant changes happen?",
+]
+# References to running prefetch tasks, so they are not garbage collected
+prefetch_tasks: set = set()
+
+# Analyses currently running, by cache key
+inflight_analyses: Dict[str, asyncio.Task] = {}
 
-app = FastAPI(title="Codebase Time Machine API")
+redis_client = None
+if os.environ.get("REDIS_URL"):
+    if redis is None:
+        logger.warning("REDIS_URL is set but the redis package is not installed; using in-process cache")
+    else:
+        redis_client = redis.from_url(os.environ["REDIS_URL"])
+
+# orjson renders the large commit/visualization payloads much faster than stdlib json
+app = FastAPI(title="Codebase Time Machine API", default_response_class=ORJSONResponse)
 
 # CORS middleware for React frontend
 # Allow both development and production origins
@@ -45,6 +93,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip responses except server-sent event streams, which gzip would buffer"""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Commit lists and diff excerpts are highly compressible text
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=1024, compresslevel=5)
+
 class AnalyzeRequest(BaseModel):
     repo_url: str
     topic: str = "auth"
@@ -61,34 +121,125 @@ class AnalyzeResponse(BaseModel):
     qa_data: dict = None
     visualizations: dict = None
 
+def _cache_key(repo_url: str, topic: str) -> str:
+    """Cache key for a repository/topic analysis"""
+    return f"cache:{xxhash.xxh3_128_hexdigest(repo_url.encode())}:{topic}"
+
+async def get_cached_commits(repo_url: str, topic: str) -> Optional[List[Dict[str, Any]]]:
+    """Return cached commits for a repository/topic, or None on a miss"""
+    key = _cache_key(repo_url, topic)
+    
+    if redis_client is not None:
+        try:
+            data = await redis_client.get(key)
+        except Exception as e:
+            logger.warning(f"Redis read failed: {e}")
+            return None
+        return orjson.loads(data) if data is not None else None
+    
+    entry = repo_cache.get(key)
+    if entry is None:
+        return None
+    if entry['expires_at'] <= time.time():
+        del repo_cache[key]
+        return None
+    return entry['commits']
+
+async def set_cached_commits(repo_url: str, topic: str, commits: List[Dict[str, Any]]) -> None:
+    """Cache commits for a repository/topic; empty results are cached briefly"""
+    key = _cache_key(repo_url, topic)
+    ttl = CACHE_EXPIRY_SECONDS if commits else NEGATIVE_CACHE_SECONDS
+    
+    if redis_client is not None:
+        try:
+            await redis_client.setex(key, ttl, orjson.dumps(commits))
+        except Exception as e:
+            logger.warning(f"Redis write failed: {e}")
+        return
+    
+    now = time.time()
+    repo_cache[key] = {
+        'commits': commits,
+        'timestamp': now,
+        'expires_at': now + ttl
+    }
+    heapq.heappush(cache_expiry_heap, (now + ttl, key))
+    evict_expired(now)
+
+def evict_expired(now: float) -> None:
+    """Drop expired in-process cache entries, oldest expiry first"""
+    while cache_expiry_heap and cache_expiry_heap[0][0] <= now:
+        expires_at, key = heapq.heappop(cache_expiry_heap)
+        entry = repo_cache.get(key)
+        # Skip heap records superseded by a later write of the same key
+        if entry is not None and entry['expires_at'] == expires_at:
+            del repo_cache[key]
+
+async def load_commits(repo_url: str, topic: str) -> List[Dict[str, Any]]:
+    """Get topic commits from the cache, analyzing the repository on a miss"""
+    commits = await get_cached_commits(repo_url, topic)
+    if commits is not None:
+        logger.info(f"Cache hit for {repo_url} ({topic}): {len(commits)} commits")
+        return commits
+    
+    # Concurrent requests for the same analysis share one run. Shielded so a
+    # disconnecting client does not cancel the work others are waiting on
+    key = _cache_key(repo_url, topic)
+    task = inflight_analyses.get(key)
+    if task is None:
+        task = asyncio.create_task(analyze_and_cache(repo_url, topic))
+        inflight_analyses[key] = task
+        task.add_done_callback(lambda _: inflight_analyses.pop(key, None))
+    else:
+        logger.info(f"Joining in-flight analysis of {repo_url} ({topic})")
+    return await asyncio.shield(task)
+
+async def analyze_and_cache(repo_url: str, topic: str) -> List[Dict[str, Any]]:
+    """Analyze a repository and cache the topic commits"""
+    commits = await git_analyzer.analyze_repo(repo_url, topic)
+    await set_cached_commits(repo_url, topic, commits)
+    return commits
+
+async def prefetch_follow_ups(gpt_summarizer: GPTSummarizer, commits: List[Dict[str, Any]], topic: str, visualizations: Dict[str, Any]) -> None:
+    """Answer common follow-up questions so later /qa requests hit the cache"""
+    questions = [question.format(topic=topic) for question in FOLLOW_UP_QUESTIONS]
+    await asyncio.gather(*(
+        gpt_summarizer.process_qa(question, commits, topic, visualizations)
+        for question in questions
+    ))
+    logger.info(f"Prefetched {len(questions)} follow-up answers for topic: {topic}")
+
 @app.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_repo(request: AnalyzeRequest):
     """Analyze a GitHub repository for feature evolution"""
     try:
         logger.info(f"Analyzing repo: {request.repo_url} for topic: {request.topic}")
         
-        # Initialize analyzers
-        git_analyzer = GitAnalyzer()
-        gpt_summarizer = GPTSummarizer()
+        gpt_summarizer = get_gpt_summarizer()
         
         # Clone and analyze repository
-        commits = await git_analyzer.analyze_repo(request.repo_url, request.topic)
+        commits = await load_commits(request.repo_url, request.topic)
         
         if not commits:
             raise HTTPException(status_code=404, detail="No commits found for the specified topic")
         
-        # Generate GPT summary
-        summary = await gpt_summarizer.summarize_commits(commits, request.topic)
-        
-        # Create timeline data
-        timeline = git_analyzer.create_timeline(commits)
-        
-        # Generate visualization data
-        visualizations = git_analyzer.generate_visualization_data(commits)
-        
-        # Process default Q&A
+        # Summary and default Q&A share the commit context, so one GPT call
+        # answers both. Timeline and visualization data are built in worker
+        # threads while it is in flight
         default_question = f"How did {request.topic} evolve in this codebase?"
-        qa_data = await gpt_summarizer.process_qa(default_question, commits, request.topic, visualizations)
+        result, timeline, visualizations = await asyncio.gather(
+            gpt_summarizer.summarize_and_qa_batch(commits, request.topic, default_question),
+            asyncio.to_thread(git_analyzer.create_timeline, commits),
+            asyncio.to_thread(git_analyzer.generate_visualization_data, commits)
+        )
+        summary = result["summary"]
+        qa_data = result["qa_data"]
+        qa_data["visualizations"] = visualizations
+        
+        # Warm the Q&A cache for likely follow-ups without delaying the response
+        task = asyncio.create_task(prefetch_follow_ups(gpt_summarizer, commits, request.topic, visualizations))
+        prefetch_tasks.add(task)
+        task.add_done_callback(prefetch_tasks.discard)
         
         logger.info(f"Analysis complete. Found {len(commits)} commits.")
         
@@ -100,23 +251,64 @@ async def analyze_repo(request: AnalyzeRequest):
             visualizations=visualizations
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Analysis failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analyze/stream")
+async def analyze_repo_stream(request: AnalyzeRequest):
+    """Analyze a repository, streaming the GPT summary as server-sent events"""
+    try:
+        logger.info(f"Streaming analysis of repo: {request.repo_url} for topic: {request.topic}")
+        
+        gpt_summarizer = get_gpt_summarizer()
+        
+        commits = await load_commits(request.repo_url, request.topic)
+        
+        if not commits:
+            raise HTTPException(status_code=404, detail="No commits found for the specified topic")
+        
+        timeline, visualizations = await asyncio.gather(
+            asyncio.to_thread(git_analyzer.create_timeline, commits),
+            asyncio.to_thread(git_analyzer.generate_visualization_data, commits)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Streaming analysis failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    def sse(event: str, data: Any) -> str:
+        return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+    
+    async def events():
+        # Commit data first so the page can render while the summary streams
+        yield sse("analysis", {"commits": commits, "timeline": timeline, "visualizations": visualizations})
+        try:
+            async for text in gpt_summarizer.stream_summary(commits, request.topic):
+                yield sse("summary", {"delta": text})
+        except Exception as e:
+            # The summary sent so far is truncated
+            yield sse("error", {"detail": str(e)})
+            return
+        yield sse("done", {})
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @app.post("/qa")
 async def ask_question(request: QARequest):
     """Answer questions about repository evolution"""
     try:
         logger.info(f"Processing Q&A: {request.question}")
         
-        # Initialize analyzers
-        git_analyzer = GitAnalyzer()
-        gpt_summarizer = GPTSummarizer()
+        gpt_summarizer = get_gpt_summarizer()
         
         # Clone and analyze repository
         topic = request.topic or "general"
-        commits = await git_analyzer.analyze_repo(request.repo_url, topic)
+        commits = await load_commits(request.repo_url, topic)
         
         if not commits:
             raise HTTPException(status_code=404, detail="No commits found for the specified topic")
@@ -131,6 +323,8 @@ async def ask_question(request: QARequest):
         
         return qa_response
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Q&A failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -138,6 +332,9 @@ async def ask_question(request: QARequest):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    if redis_client is not None:
+        return {"status": "healthy", "cache": "redis"}
+    
     cache_size = len(repo_cache)
     return {
         "status": "healthy",
@@ -149,34 +346,39 @@ async def health_check():
 async def clear_cache():
     """Clear repository cache"""
     global repo_cache
+    if redis_client is not None:
+        keys = [key async for key in redis_client.scan_iter(match="cache:*")]
+        if keys:
+            await redis_client.delete(*keys)
+        logger.info(f"Cleared Redis cache with {len(keys)} entries")
+        return {"status": "cache cleared", "entries_removed": len(keys)}
+    
     cache_size = len(repo_cache)
     repo_cache.clear()
+    cache_expiry_heap.clear()
     logger.info(f"Cleared cache with {cache_size} entries")
     return {"status": "cache cleared", "entries_removed": cache_size}
 
-# Cleanup old cache entries periodically
-async def cleanup_cache():
-    """Remove expired cache entries"""
-    while True:
-        await asyncio.sleep(900)  # Check every 15 minutes
-        current_time = time.time()
-        expired_keys = [
-            key for key, value in repo_cache.items()
-            if current_time - value.get('timestamp', 0) > CACHE_EXPIRY_SECONDS
-        ]
-        
-        for key in expired_keys:
-            del repo_cache[key]
-        
-        if expired_keys:
-            logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
-
 @app.on_event("startup")
 async def startup_event():
-    """Start background tasks"""
-    asyncio.create_task(cleanup_cache())
+    """Trim the clone cache left by previous runs and start loading the tokenizer"""
+    load_tokenizer()
+    await asyncio.to_thread(git_analyzer.clone_cache.sweep)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled API and cache connections"""
+    await GPTSummarizer.aclose()
+    if redis_client is not None:
+        await redis_client.aclose()
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 5002))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Caches are per process unless REDIS_URL is set, so run a single worker
+    # unless more are requested; the app is passed by import string so
+    # workers can import it
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    if workers > 1 and redis_client is None:
+        logger.warning(f"Running {workers} workers without REDIS_URL; analysis, GPT and in-flight caches are per worker")
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers, loop="uvloop", http="httptools")
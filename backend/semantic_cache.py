@@ -0,0 +1,55 @@
+
+import xxhash
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+class SemanticCache:
+    """LRU cache of GPT results with exact and embedding-similarity lookup"""
+    
+    def __init__(self, max_entries: int = 1024, threshold: float = 0.92):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        # key -> (scope, normalized query embedding or None, result)
+        self._entries: 'OrderedDict[str, Tuple[str, Optional[np.ndarray], Any]]' = OrderedDict()
+    
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Hash key parts into a cache key"""
+        return xxhash.xxh3_128_hexdigest('\x1f'.join(parts).encode())
+    
+    def get(self, key: str) -> Any:
+        """Exact lookup; returns None on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+    
+    def nearest(self, scope: str, embedding: Optional[np.ndarray]) -> Any:
+        """Return the result of the most similar query within a scope, if close enough"""
+        if embedding is None:
+            return None
+        
+        # Only queries asked against the same commits are comparable
+        candidates = [(key, entry[1]) for key, entry in self._entries.items()
+                      if entry[0] == scope and entry[1] is not None]
+        if not candidates:
+            return None
+        
+        # Embeddings are unit length, so the dot product is cosine similarity
+        scores = np.stack([vector for _, vector in candidates]) @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        
+        key = candidates[best][0]
+        self._entries.move_to_end(key)
+        return self._entries[key][2]
+    
+    def put(self, key: str, scope: str, embedding: Optional[np.ndarray], result: Any) -> None:
+        """Store a result, evicting the least recently used entry when full"""
+        self._entries[key] = (scope, embedding, result)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)